@@ -0,0 +1,24 @@
+"""Build the optional Cython extension of `topf`."""
+
+from setuptools import Extension
+
+
+def build(setup_kwargs):
+    """Add the compiled sweep to the extension modules, if possible.
+
+    The extension is optional: if Cython is not available or if the
+    compilation fails, `topf` falls back to its `numba` or pure Python
+    implementation.
+    """
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        return
+
+    extensions = [
+        Extension('topf._sweep', ['topf/_sweep.pyx'], optional=True)
+    ]
+
+    setup_kwargs.update({
+        'ext_modules': cythonize(extensions),
+    })
@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 
 from topf import PersistenceTransformer
+from topf.topf import PersistenceDiagram
 
 
 class DegenerateFunction(unittest.TestCase):
@@ -126,3 +127,137 @@ class DiagramPlateauPoints(unittest.TestCase):
 
         self.assertEqual(diagram1.total_persistence(), 15.0)
         self.assertEqual(diagram2.total_persistence(), 3.0)
+
+
+class TotalPersistence(unittest.TestCase):
+    """
+    Checks the total persistence calculation for different exponents.
+    """
+
+    def test(self):
+        a = [(0, 3), (1, 1), (2, 8), (3, 2), (4, 7), (5, 5), (6, 6), (7, 4)]
+
+        transformer = PersistenceTransformer(
+            calculate_persistence_diagram=True
+        )
+        persistence = transformer.fit_transform(a)
+        diagram = transformer.persistence_diagram
+
+        self.assertEqual(diagram.total_persistence(), 15.0)
+        self.assertAlmostEqual(
+            diagram.total_persistence(2.0),
+            np.sqrt(np.sum(persistence[:, 1]**2))
+        )
+        self.assertAlmostEqual(
+            diagram.total_persistence(3.0),
+            np.sum(persistence[:, 1]**3)**(1.0 / 3.0)
+        )
+
+        # Modifying the inputs of a diagram must neither change it nor
+        # invalidate its cached total persistence values.
+        births = np.array([3.0, 8.0, 6.0, 7.0])
+        deaths = np.array([1.0, 1.0, 5.0, 2.0])
+
+        diagram = PersistenceDiagram(births, deaths)
+        self.assertEqual(diagram.total_persistence(), 15.0)
+
+        births[0] = 100.0
+        self.assertEqual(diagram[0], (3.0, 1.0))
+        self.assertEqual(diagram.total_persistence(), 15.0)
+        self.assertEqual(
+            PersistenceDiagram(births, deaths).total_persistence(), 112.0
+        )
+
+
+class SinglePrecision(unittest.TestCase):
+    """
+    Checks that single precision inputs are not converted to double
+    precision and yield the same persistence values.
+    """
+
+    def test(self):
+        a = [(0, 3), (1, 1), (2, 6), (3, 5), (4, 8), (5, 2), (6, 7), (7, 4)]
+
+        persistence_32 = PersistenceTransformer().fit_transform(
+            np.asarray(a, dtype=np.float32)
+        )
+        persistence_64 = PersistenceTransformer().fit_transform(a)
+
+        self.assertEqual(persistence_32.dtype, np.float32)
+        self.assertEqual(persistence_64.dtype, np.float64)
+        self.assertTrue(np.all(persistence_32 == persistence_64))
+
+
+class PeakFilteringBounds(unittest.TestCase):
+    """
+    Checks peak filtering when the number of requested peaks is close
+    to or larger than the number of points.
+    """
+
+    def test(self):
+        a = [(0, 3), (1, 1), (2, 6), (3, 5), (4, 8), (5, 2), (6, 7), (7, 4)]
+
+        persistence = PersistenceTransformer().fit_transform(a)
+
+        for n_peaks in [len(a) - 1, len(a)]:
+            filtered = PersistenceTransformer(
+                n_peaks=n_peaks
+            ).fit_transform(a)
+
+            self.assertTrue(np.all(filtered == persistence))
+
+        for n_peaks in [0, -1, len(a) + 1]:
+            pt = PersistenceTransformer(n_peaks=n_peaks)
+            self.assertRaises(RuntimeError, pt.fit_transform, a)
+
+
+class DiagramFromPairs(unittest.TestCase):
+    """
+    Checks that a persistence diagram can be created from a sequence
+    of pairs as well as from separate births and deaths.
+    """
+
+    def test(self):
+        pairs = [(3, 1), (8, 1), (6, 5), (7, 2)]
+
+        diagram1 = PersistenceDiagram(pairs)
+        diagram2 = PersistenceDiagram([3, 8, 6, 7], [1, 1, 5, 2])
+
+        self.assertEqual(len(diagram1), len(pairs))
+        self.assertEqual(tuple(diagram1[1]), pairs[1])
+        self.assertTrue(np.all(diagram1[0:2] == pairs[0:2]))
+        self.assertTrue(np.all(diagram1.pairs == diagram2.pairs))
+        self.assertEqual(diagram1.total_persistence(), 15.0)
+        self.assertAlmostEqual(
+            diagram1.total_persistence(3.0),
+            np.sum(np.power([2, 7, 1, 5], 3))**(1.0 / 3.0)
+        )
+        self.assertEqual(len(PersistenceDiagram([])), 0)
+
+        # Births without deaths are not mistaken for pairs.
+        self.assertRaises(RuntimeError, PersistenceDiagram, [3, 8, 6, 7])
+        self.assertRaises(RuntimeError, PersistenceDiagram, [(3, 1, 2)])
+
+        for shape in [(5, 0), (0, 3), (0, 0, 2)]:
+            self.assertRaises(
+                RuntimeError, PersistenceDiagram, np.empty(shape)
+            )
+
+        # Births and deaths have to be sequences of the same length.
+        self.assertRaises(RuntimeError, PersistenceDiagram, [3, 8], [1])
+        self.assertRaises(RuntimeError, PersistenceDiagram, pairs, pairs)
+
+
+class SmallNonIntegerValues(unittest.TestCase):
+    """
+    Checks that values which only differ by less than one from integer
+    values are not sorted as if they were integers.
+    """
+
+    def test(self):
+        for y_max in [5, 60000]:
+            for y_min in [1e-20, 1e-12]:
+                a = [(0, y_max), (1, 0), (2, y_min), (3, y_max)]
+
+                persistence = PersistenceTransformer().fit_transform(a)
+                self.assertEqual(list(persistence[:, 1]), [y_max, 0, 0, y_max])
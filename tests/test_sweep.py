@@ -0,0 +1,113 @@
+import importlib.util
+import sys
+import unittest
+import unittest.mock
+
+import numpy as np
+
+import topf.topf
+
+
+def _load_sweep(block_numba):
+    """Load a separate copy of the sweep without its Cython extension.
+
+    The copy is not part of the package, so the relative import of the
+    extension fails. If `block_numba` is set, `numba` is not available
+    either, resulting in the interpreted version of the sweep. Else,
+    the copy is compiled without caching; cached functions of the copy
+    could not be loaded by the package itself.
+    """
+    spec = importlib.util.spec_from_file_location(
+        '_topf_without_extension', topf.topf.__file__
+    )
+    module = importlib.util.module_from_spec(spec)
+
+    if block_numba:
+        patch = unittest.mock.patch.dict(sys.modules, {'numba': None})
+    else:
+        import numba
+
+        numba_njit = numba.njit
+
+        def njit(*args, **kwargs):
+            kwargs['cache'] = False
+            return numba_njit(*args, **kwargs)
+
+        patch = unittest.mock.patch.object(numba, 'njit', njit)
+
+    with patch:
+        spec.loader.exec_module(module)
+
+    return module._sweep
+
+
+def _run(sweep, y, calc_diagram):
+    """Run a sweep over `y` and return persistence values and deaths."""
+    n_vertices = len(y)
+    kind = topf.topf._classify(y)
+    uf = topf.topf.UnionFind(n_vertices)
+
+    persistence = np.zeros(n_vertices, dtype=y.dtype)
+    deaths = y.copy() if calc_diagram else np.empty(0, dtype=y.dtype)
+
+    sweep(
+        y,
+        kind,
+        np.count_nonzero(kind == topf.topf._MINIMUM),
+        topf.topf._argsort_descending(y),
+        uf.parent,
+        uf.rank,
+        uf.peak,
+        persistence,
+        deaths,
+        calc_diagram
+    )
+
+    return persistence, deaths
+
+
+class Backends(unittest.TestCase):
+    """
+    Checks that every available implementation of the sweep yields the
+    same results as the interpreted one.
+    """
+
+    def test(self):
+        reference = _load_sweep(block_numba=True)
+        backends = {'default': topf.topf._sweep}
+
+        if importlib.util.find_spec('numba') is not None:
+            backends['numba'] = _load_sweep(block_numba=False)
+
+        try:
+            from topf._sweep import sweep
+            backends['cython'] = sweep
+        except ImportError:
+            pass
+
+        rng = np.random.RandomState(42)
+
+        for n in [1, 2, 3, 10, 100, 1000]:
+            for dtype in [np.float32, np.float64]:
+                # Integer values in a small range result in many ties
+                # and plateaus, whereas the others are almost always
+                # unique.
+                for y in [
+                    rng.randint(0, 5, size=n).astype(dtype),
+                    rng.normal(size=n).astype(dtype)
+                ]:
+                    for calc_diagram in [False, True]:
+                        expected = _run(reference, y, calc_diagram)
+
+                        for name, sweep in backends.items():
+                            with self.subTest(
+                                backend=name,
+                                n=n,
+                                dtype=dtype,
+                                calc_diagram=calc_diagram
+                            ):
+                                result = _run(sweep, y, calc_diagram)
+
+                                for a, b in zip(result, expected):
+                                    self.assertEqual(a.dtype, b.dtype)
+                                    self.assertTrue(np.array_equal(a, b))
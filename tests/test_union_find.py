@@ -0,0 +1,57 @@
+import unittest
+
+from topf import UnionFind
+
+
+class UnionByRank(unittest.TestCase):
+    def test(self):
+        uf = UnionFind(4)
+
+        root = uf.merge(0, 1)
+        self.assertEqual(uf.find(0), root)
+        self.assertEqual(uf.find(1), root)
+
+        # Merging a singleton into a larger tree must not change the
+        # root of the larger tree.
+        self.assertEqual(uf.merge(2, 0), root)
+        self.assertEqual(uf.merge(1, 2), root)
+
+        self.assertNotEqual(uf.find(3), root)
+        self.assertEqual(uf.rank[root], 1)
+
+
+class LongChain(unittest.TestCase):
+    """
+    Checks that `find` does not recurse along long chains, which would
+    otherwise exceed the recursion limit.
+    """
+
+    def test(self):
+        n = 100000
+        uf = UnionFind(n)
+
+        # Build a degenerate chain manually, bypassing union by rank.
+        uf.parent[1:] = range(n - 1)
+
+        self.assertEqual(uf.find(n - 1), 0)
+        self.assertEqual(uf.find(n // 2), 0)
+
+
+class Peaks(unittest.TestCase):
+    """
+    Checks that the peak of a merged component follows the order of
+    the merge, regardless of the rank of the respective components.
+    """
+
+    def test(self):
+        uf = UnionFind(4)
+
+        uf.merge(0, 1)
+        uf.merge(1, 2)
+        self.assertEqual(uf.peak[uf.find(0)], 2)
+
+        # The component of 3 has a lower rank but still determines the
+        # peak of the merged component.
+        root = uf.merge(0, 3)
+        self.assertNotEqual(root, 3)
+        self.assertEqual(uf.peak[root], 3)
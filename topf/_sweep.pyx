@@ -0,0 +1,116 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled version of the sweep of `topf.PersistenceTransformer`.
+
+This module mirrors `topf.topf._sweep` and the Union--Find kernels it
+uses. Please refer to the pure Python implementation for more details
+on the algorithm; both implementations have to be kept in sync, which
+is checked by `tests/test_sweep.py`.
+"""
+
+from cython cimport floating
+
+# Types of vertices of a function; see `topf.topf` for their meaning.
+cdef enum:
+    _MAXIMUM = 0
+    _MINIMUM = 1
+    _REGULAR = 2
+
+
+cdef inline Py_ssize_t _find(Py_ssize_t u, Py_ssize_t[::1] parent) nogil:
+    """Find root of `u` in a Union--Find forest stored in `parent`."""
+    while parent[u] != u:
+        parent[u] = parent[parent[u]]
+        u = parent[u]
+
+    return u
+
+
+cdef inline Py_ssize_t _link(
+    Py_ssize_t root_u,
+    Py_ssize_t root_v,
+    Py_ssize_t[::1] parent,
+    unsigned char[::1] rank,
+    Py_ssize_t[::1] peak
+) nogil:
+    """Link root `root_u` into `root_v` and return new root."""
+    cdef Py_ssize_t tmp
+    cdef Py_ssize_t peak_v
+
+    if root_u == root_v:
+        return root_u
+
+    peak_v = peak[root_v]
+
+    if rank[root_u] > rank[root_v]:
+        tmp = root_u
+        root_u = root_v
+        root_v = tmp
+
+    parent[root_u] = root_v
+    peak[root_v] = peak_v
+
+    if rank[root_u] == rank[root_v]:
+        rank[root_v] += 1
+
+    return root_v
+
+
+def sweep(
+    floating[::1] y,
+    unsigned char[::1] kind,
+    Py_ssize_t n_minima,
+    Py_ssize_t[::1] indices,
+    Py_ssize_t[::1] parent,
+    unsigned char[::1] rank,
+    Py_ssize_t[::1] peak,
+    floating[::1] persistence,
+    floating[::1] deaths,
+    bint calc_diagram
+):
+    """Sweep over a function in descending order of its values."""
+    cdef Py_ssize_t k, index
+    cdef Py_ssize_t left_root, right_root, index_root, root
+    cdef Py_ssize_t left_peak, right_peak
+    cdef Py_ssize_t young_root, young_peak, old_root
+    cdef unsigned char vertex_kind
+    cdef floating y_index
+
+    with nogil:
+        for k in range(indices.shape[0]):
+            if n_minima == 0:
+                break
+
+            index = indices[k]
+            vertex_kind = kind[index]
+
+            if vertex_kind == _MAXIMUM:
+                continue
+
+            y_index = y[index]
+
+            left_root = _find(index - 1, parent)
+            right_root = _find(index + 1, parent)
+            index_root = _find(index, parent)
+
+            left_peak = peak[left_root]
+            right_peak = peak[right_root]
+
+            if y[left_peak] < y[right_peak]:
+                young_root, young_peak = left_root, left_peak
+                old_root = right_root
+            else:
+                young_root, young_peak = right_root, right_peak
+                old_root = left_root
+
+            if vertex_kind == _MINIMUM:
+                persistence[young_peak] = y[young_peak] - y_index
+
+                if calc_diagram:
+                    deaths[young_peak] = y_index
+
+                root = _link(young_root, index_root, parent, rank, peak)
+                _link(root, _find(old_root, parent), parent, rank, peak)
+
+                n_minima -= 1
+            else:
+                _link(index_root, old_root, parent, rank, peak)
@@ -29,19 +29,320 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+# Notes on performance
+# --------------------
+#
+# Apart from sorting, the calculation consists of a single sweep over
+# all vertices. Every step performs a few comparisons and a handful of
+# Union--Find operations; there is virtually no arithmetic. The sweep
+# is thus bound by memory latency, not by computation. Its dominant
+# cost is pointer chasing in `find()`, which is bounded by path halving
+# and union by rank to an amortised O(alpha(n)) reads per call.
+#
+# Consequently, vectorising scalar operations (SIMD, GPUs) will *not*
+# improve the sweep. Changes should rather
+#
+#   - remove interpreter overhead (see the `numba` and Cython versions),
+#   - reduce the memory traffic per step, e.g. by keeping the parent
+#     array small and contiguous or avoiding redundant `find()` calls,
+#   - fuse passes over the data that are performed with `numpy`.
+
 __version__ = '0.1.0'
 
 import numpy as np
 import collections.abc
 
+# Prefer the ahead-of-time compiled version of the sweep if the package
+# has been built with its Cython extension. Only if it is unavailable,
+# `numba` is imported, since importing it takes considerably longer.
+# The Union--Find kernels below are then interpreted when being called
+# by `UnionFind` itself; the sweep does not use them in this case.
+try:
+    from ._sweep import sweep as _compiled_sweep
+except ImportError:
+    _compiled_sweep = None
+
+_HAS_NUMBA = False
+
+if _compiled_sweep is None:
+    try:
+        from numba import njit
+        _HAS_NUMBA = True
+    except ImportError:
+        pass
+
+if not _HAS_NUMBA:
+    def njit(*args, **kwargs):
+        """Fall back to pure Python if `numba` is not used.
+
+        Supports the same calling conventions as the `numba.njit`
+        decorator but leaves the decorated function untouched.
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        return lambda function: function
+
+
+# Types of vertices of a function. Boundary vertices are treated like
+# maxima because they are never merged during the sweep.
+_MAXIMUM = 0
+_MINIMUM = 1
+_REGULAR = 2
+
+
+@njit(cache=True)
+def _find(parent, u):
+    """Find root of `u` in a Union--Find forest stored in `parent`."""
+    # Perform path halving: every vertex on the path is attached to
+    # its grandparent. This requires only a single pass and, unlike
+    # a recursive implementation, no additional stack frames.
+    while parent[u] != u:
+        parent[u] = parent[parent[u]]
+        u = parent[u]
+
+    return u
+
+
+@njit(cache=True)
+def _link(parent, rank, peak, root_u, root_v):
+    """Link root `root_u` into `root_v` and return new root.
+
+    The tree of lower rank is attached to the tree of higher rank, but
+    the peak of `root_v` always becomes the peak of the merged tree.
+    """
+    if root_u == root_v:
+        return root_u
+
+    peak_v = peak[root_v]
+
+    if rank[root_u] > rank[root_v]:
+        root_u, root_v = root_v, root_u
+
+    parent[root_u] = root_v
+    peak[root_v] = peak_v
+
+    if rank[root_u] == rank[root_v]:
+        rank[root_v] += 1
+
+    return root_v
+
+
+@njit(cache=True)
+def _merge(parent, rank, peak, u, v):
+    """Merge component of `u` into component of `v`; return new root."""
+    return _link(parent, rank, peak, _find(parent, u), _find(parent, v))
+
+
+@njit(cache=True, boundscheck=False)
+def _sweep(
+    y,
+    kind,
+    n_minima,
+    indices,
+    parent,
+    rank,
+    peak,
+    persistence,
+    deaths,
+    calc_diagram
+):
+    """Sweep over a function in descending order of its values.
+
+    Performs the merges of the Union--Find forest stored in `parent`
+    and `rank` according to the vertex types stored in `kind`, and
+    assigns persistence values to all peaks that are being merged into
+    an older peak. The peak of each component is stored in `peak` at
+    the index of its root and maintained by the merges. If the flag
+    `calc_diagram` is set, the death of every peak is stored in
+    `deaths` as well.
+
+    Since every local minimum creates exactly one pair, the sweep stops
+    as soon as all `n_minima` local minima have been processed. All the
+    remaining points would only be merged into existing components.
+    """
+    # Bind all global names that are used in the loop to local names.
+    # This saves a dictionary lookup per access if the function is not
+    # compiled.
+    find = _find
+    link = _link
+    maximum = _MAXIMUM
+    minimum = _MINIMUM
+
+    for k in range(len(indices)):
+        if n_minima == 0:
+            break
+
+        index = indices[k]
+        vertex_kind = kind[index]
+
+        # Maxima and boundary points do not have to be merged with
+        # any of their neighbours.
+        if vertex_kind == maximum:
+            continue
+
+        left_index = index - 1
+        right_index = index + 1
+
+        y_index = y[index]
+
+        # Every root is only looked up once per vertex; all subsequent
+        # merges operate on the roots directly.
+        left_root = find(parent, left_index)
+        right_root = find(parent, right_index)
+        index_root = find(parent, index)
+
+        left_peak = peak[left_root]
+        right_peak = peak[right_root]
+
+        # The younger neighbour is the one whose peak has the lower
+        # function value. Selecting both neighbours at once permits
+        # handling all subsequent cases symmetrically.
+        if y[left_peak] < y[right_peak]:
+            young_root, young_peak = left_root, left_peak
+            old_root = right_root
+        else:
+            young_root, young_peak = right_root, right_peak
+            old_root = left_root
+
+        # The point is a local minimum, so we have to merge the
+        # two neighbours. The younger neighbour will be merged into
+        # the older one.
+        if vertex_kind == minimum:
+            persistence[young_peak] = y[young_peak] - y_index
+
+            if calc_diagram:
+                deaths[young_peak] = y_index
+
+            root = link(parent, rank, peak, young_root, index_root)
+            link(parent, rank, peak, root, find(parent, old_root))
+
+            n_minima -= 1
+
+        # The point is a regular point, i.e. one neighbour
+        # has a higher function value, the other one has a
+        # lower function value.
+        #
+        # Always merge the current point into the higher one of its
+        # neighbours. This merge does not result in a pair.
+        else:
+            link(parent, rank, peak, index_root, old_root)
+
+
+def _on_lists(sweep):
+    """Make an interpreted sweep operate on lists instead of arrays.
+
+    Indexing a `list` is considerably faster than indexing an array if
+    the code is interpreted. Hence, all arrays used by the sweep are
+    converted to lists beforehand. Arrays that are modified during the
+    sweep are updated afterwards.
+    """
+    def sweep_on_lists(
+        y,
+        kind,
+        n_minima,
+        indices,
+        parent,
+        rank,
+        peak,
+        persistence,
+        deaths,
+        calc_diagram
+    ):
+        modified = [parent, rank, peak, persistence, deaths]
+        modified_lists = [array.tolist() for array in modified]
+
+        sweep(
+            y.tolist(),
+            kind.tolist(),
+            n_minima,
+            indices.tolist(),
+            *modified_lists,
+            calc_diagram
+        )
+
+        for array, values in zip(modified, modified_lists):
+            array[:] = values
+
+    return sweep_on_lists
+
+
+# Use the compiled version of the sweep if available. Else, the sweep
+# has already been compiled with `numba`, if it is available, or it is
+# interpreted.
+if _compiled_sweep is not None:
+    _sweep = _compiled_sweep  # noqa: F811
+elif not _HAS_NUMBA:
+    _sweep = _on_lists(_sweep)
+
+
+def _classify(y):
+    """Classify all vertices of a function by their neighbours.
+
+    Returns
+    -------
+    `np.array` of shape (n,) that contains the type of every vertex,
+    i.e. `_MAXIMUM`, `_MINIMUM`, or `_REGULAR`.
+    """
+    kind = np.full(len(y), _MAXIMUM, dtype=np.uint8)
+
+    y_left = y[:-2]
+    y_center = y[1:-1]
+    y_right = y[2:]
+
+    is_minimum = (y_left >= y_center) & (y_center <= y_right)
+    is_maximum = (y_center > y_left) & (y_center > y_right)
+
+    kind[1:-1][is_minimum] = _MINIMUM
+    kind[1:-1][~is_minimum & ~is_maximum] = _REGULAR
+
+    return kind
+
+
+def _argsort_descending(y):
+    """Return indices that sort `y` in descending order.
+
+    The sort is stable, i.e. among points with the same value, points
+    with a smaller index will be sorted first.
+    """
+    # Functions with integer values in a small range, such as quantized
+    # signals, are sorted by means of 16-bit keys. `numpy` uses a radix
+    # sort for stable sorts of such keys, which takes linear time. Since
+    # the keys are reversed, an ascending sort yields a descending order
+    # of the function values. The function values themselves have to be
+    # integral; integral differences could still be rounded.
+    if len(y) > 0:
+        y_max = y.max()
+
+        if y_max - y.min() <= np.iinfo(np.uint16).max \
+                and np.array_equal(y, np.rint(y)):
+            keys = (y_max - y).astype(np.uint16)
+
+            return np.argsort(keys, kind='stable')
+
+    # Sorting the reversed array in ascending order and reversing the
+    # result afterwards yields a descending order in which ties are
+    # still resolved in favour of smaller indices. Unlike sorting `-y`,
+    # this does not require a negated copy of the input. The indices
+    # are mapped back in a single pass that also makes them contiguous
+    # again, such that the sweep always receives the same layout.
+    indices = np.argsort(y[::-1], kind='stable')
+
+    return np.subtract(len(y) - 1, indices[::-1])
+
 
 class UnionFind:
     """An implementation of a Union--Find class.
 
     Basic implementation of a Union--Find algorithm for a set of
     vertices with contiguous vertex indices. The class performs path
-    compression by default and uses integers internally for storing
-    a disjoint set.
+    halving and union by rank by default and uses flat integer
+    arrays internally for storing a disjoint set.
+
+    Since union by rank determines the root of a merged component, the
+    class additionally stores the *peak* of every component at the index
+    of its root. The peak is the vertex that represents the component
+    and is only determined by the order of merges.
 
     The class requires the vertices to form a contiguous sequence, so no
     gaps are allowed. The vertices also have to be zero-indexed.
@@ -59,62 +360,122 @@ class UnionFind:
             Number of vertices
         """
         self.n_vertices = n_vertices
-        self.parent = {x: x for x in range(n_vertices)}
+        self.parent = np.arange(n_vertices, dtype=np.intp)
+        self.rank = np.zeros(n_vertices, dtype=np.uint8)
+        self.peak = np.arange(n_vertices, dtype=np.intp)
 
     def find(self, u):
         """Find and return parent of `u`."""
-        if self.parent[u] == u:
-            return u
-        else:
-            # Perform path collapse operation
-            self.parent[u] = self.find(self.parent[u])
-            return self.parent[u]
+        return _find(self.parent, u)
 
     def merge(self, u, v):
         """Merge `u` into the component of `v`.
 
         Merges vertex u into the component of vertex v. Note the
-        asymmetry of this operation.
+        asymmetry of this operation: the peak of the component of v
+        becomes the peak of the merged component. The root of the
+        merged component, however, is the root of the component with
+        the higher rank.
 
         Parameters
         ----------
         u : int
-            Source vertex
+            First vertex
+
         v : int
-            Target vertex
+            Second vertex
+
+        Returns
+        -------
+        Root of the merged component.
         """
-        if u != v:
-            self.parent[self.find(u)] = self.find(v)
+        return _merge(self.parent, self.rank, self.peak, u, v)
 
 
 class PersistenceDiagram(collections.abc.Sequence):
     """Persistence diagram storage class.
 
     Simple class for storing the pairs of a persistence diagram. This is
-    nothing but a light-weight wrapper for additional convenience.
+    nothing but a light-weight wrapper for additional convenience. The
+    births and deaths of all pairs are stored in separate arrays.
     """
 
-    def __init__(self, pairs):
-        """Create new diagram from sequence of pairs."""
-        self._pairs = pairs
+    def __init__(self, births, deaths=None):
+        """Create new diagram from sequences of births and deaths.
+
+        Parameters
+        ----------
+        births : array_like
+            Births of all pairs. If `deaths` is not specified, this is
+            expected to be a sequence of (birth, death) pairs instead.
+
+        deaths : array_like or None
+            Deaths of all pairs
+        """
+        if deaths is None:
+            pairs = np.asarray(births)
+
+            # An empty sequence does not have a second dimension, but
+            # still describes a valid (empty) diagram.
+            if pairs.ndim == 1 and pairs.size == 0:
+                pairs = pairs.reshape(0, 2)
+
+            if pairs.ndim != 2 or pairs.shape[1] != 2:
+                raise RuntimeError('Unexpected array format')
+
+            births = pairs[:, 0]
+            deaths = pairs[:, 1]
+
+        # The diagram always stores copies of its inputs, such that the
+        # caller cannot modify it afterwards.
+        self._births = np.array(births, order='C', copy=True)
+        self._deaths = np.array(deaths, order='C', copy=True)
+        self._pairs = None
+
+        if self._births.ndim != 1 or self._births.shape != self._deaths.shape:
+            raise RuntimeError('Unexpected array format')
+
+        # Cache for total persistence values, indexed by their exponent.
+        # This is valid because the diagram cannot be modified.
+        self._total_persistence = {}
 
     def __len__(self):
         """Return number of persistence pairs."""
-        return len(self._pairs)
+        return len(self._births)
 
     def __getitem__(self, index):
         """Return persistence at index `index`."""
-        return self._pairs[index]
+        # Slices and other non-scalar indices yield rows of pairs, just
+        # like indexing the array of pairs.
+        if not np.isscalar(index):
+            return self.pairs[index]
+
+        return self._births[index], self._deaths[index]
 
     def __str__(self):
         """Return string representation of the persistence diagram."""
-        return str(self._pairs)
+        return str(self.pairs)
+
+    @property
+    def pairs(self):
+        """Return pairs of the persistence diagram.
+
+        Returns
+        -------
+        `np.array` of shape (n, 2), containing the birth and the death
+        of every pair. The array is created upon first access.
+        """
+        if self._pairs is None:
+            self._pairs = np.column_stack((self._births, self._deaths))
+
+        return self._pairs
 
     def total_persistence(self, p=1.0):
         """Calculate total persistence of the persistence diagram.
 
         Calculates the sum of all persistence values in the diagram,
-        weighted by the specified power.
+        weighted by the specified power. The result is cached for every
+        exponent, so repeated calls are cheap.
 
         Parameters
         ----------
@@ -128,10 +489,37 @@ class PersistenceDiagram(collections.abc.Sequence):
         """
         assert p > 0.0
 
-        persistence_values = self._pairs[:, 0] - self._pairs[:, 1]
-        persistence_values = np.power(persistence_values, p)
+        if p not in self._total_persistence:
+            self._total_persistence[p] = self._calculate_total_persistence(p)
+
+        return self._total_persistence[p]
+
+    def _calculate_total_persistence(self, p):
+        """Calculate total persistence without caching."""
+        # The difference is always calculated in floating point, such
+        # that diagrams of integers can be raised to any power in place.
+        persistence_values = np.subtract(
+            self._births,
+            self._deaths,
+            dtype=np.result_type(self._births, self._deaths, float)
+        )
+
+        # Both powers are the identity in this case, so we can skip
+        # them altogether.
+        if p == 1.0:
+            return float(np.sum(persistence_values))
+
+        # This is the Euclidean norm, which does not require another
+        # temporary array.
+        elif p == 2.0:
+            return float(np.sqrt(np.dot(persistence_values,
+                                        persistence_values)))
+
+        # The power is calculated in place because the persistence
+        # values are a temporary array anyway.
+        np.power(persistence_values, p, out=persistence_values)
 
-        return np.power(np.sum(persistence_values), 1.0 / p)
+        return float(np.sum(persistence_values) ** (1.0 / p))
 
 
 class PersistenceTransformer:
@@ -190,83 +578,66 @@ class PersistenceTransformer:
         of the function, but with each value having been transformed to
         a persistence value.
         """
+        # Converting the input once ensures that the calculation always
+        # operates on floating point values, which also permits re-using
+        # the compiled versions of the sweep. Single precision values are
+        # kept as-is to avoid doubling the memory traffic.
         a = np.asarray(a)
 
+        if a.dtype not in (np.float32, np.float64):
+            a = a.astype(np.float64)
+
+        a = np.ascontiguousarray(a)
+
         if len(a.shape) != 2 or a.shape[1] != 2:
             raise RuntimeError('Unexpected array format')
 
+        # Only the function values are required for the calculation,
+        # so they are stored contiguously. This always creates a copy,
+        # which permits sharing `y` with the persistence diagram.
+        y = a[:, 1].copy()
+
         # This way of sorting ensures that points with the same
         # y value will be sorted according to their x value. It
         # ensures that left-most points are detected first.
-        indices = np.argsort(-a[:, 1], kind='stable')
+        indices = _argsort_descending(y)
 
         # Optionally, the function can also return a proper persistence
         # diagram, i.e. a set of tuples that describe the merges.
-        if self._calculate_persistence_diagram:
-            b = np.zeros_like(a)
-            b[:, 0] = a[:, 1]  # y
-            b[:, 1] = a[:, 1]  # y (everything is paired with itself)
+        calc_diagram = self._calculate_persistence_diagram
+
+        # Everything is paired with itself by default. Only the deaths
+        # are modified during the calculation, so the births can refer
+        # to the function values directly.
+        if calc_diagram:
+            births = y
+            deaths = y.copy()
         else:
-            b = None
+            deaths = np.empty(0, dtype=y.dtype)
 
         # Prepare Union--Find data structure; by default, every vertex
-        # is initialized to be its own parent.
+        # is initialized to be its own parent and its own peak.
         n_vertices = len(a)
         uf = UnionFind(n_vertices)
 
         # By default, all points that are not explicitly handled will be
         # assigned a persistence value of zero.
-        persistence = np.zeros(n_vertices)
-
-        for index in indices:
-            left_index = index - 1
-            right_index = index + 1
-
-            y = a[index, 1]
-
-            # Inner point: both neighbours are defined; this is easy to
-            # handle because we just have to check both of them.
-            if left_index >= 0 and right_index <= n_vertices - 1:
-                y_left = a[left_index, 1]
-                y_right = a[right_index, 1]
-
-                # The point is a local minimum, so we have to merge the
-                # two neighbours.
-                if y_left >= y and y <= y_right:
-
-                    # The left neighbour is the younger neighbour, so it
-                    # will be merged into the right one.
-                    if a[uf.find(left_index), 1] < a[uf.find(right_index), 1]:
-                        persistence[uf.find(left_index)] \
-                            = a[uf.find(left_index), 1] - y
-
-                        if self._calculate_persistence_diagram:
-                            b[uf.find(left_index), 1] = y
-
-                        uf.merge(left_index, index)
-                        uf.merge(index, right_index)
-                    else:
-                        persistence[uf.find(right_index)] \
-                            = a[uf.find(right_index), 1] - y
-
-                        if self._calculate_persistence_diagram:
-                            b[uf.find(right_index), 1] = y
-
-                        uf.merge(right_index, index)
-                        uf.merge(index, left_index)
-
-                # The point is a regular point, i.e. one neighbour
-                # has a higher function value, the other one has a
-                # lower function value.
-                elif not (y > y_left and y > y_right):
-
-                    # Always merge the current point into the higher one
-                    # of its neighbours. This merge does not result in a
-                    # pair.
-                    if a[uf.find(left_index), 1] < a[uf.find(right_index), 1]:
-                        uf.merge(index, right_index)
-                    else:
-                        uf.merge(index, left_index)
+        persistence = np.zeros(n_vertices, dtype=y.dtype)
+
+        kind = _classify(y)
+
+        _sweep(
+            y,
+            kind,
+            np.count_nonzero(kind == _MINIMUM),
+            indices,
+            uf.parent,
+            uf.rank,
+            uf.peak,
+            persistence,
+            deaths,
+            calc_diagram
+        )
 
         # Assign the persistence value to the global maximum of the
         # function to ensure that all tuples have been paired.
@@ -275,52 +646,82 @@ class PersistenceTransformer:
             global_minimum_index = indices[-1]
 
             persistence[global_maximum_index] \
-                = a[global_maximum_index, 1] - a[global_minimum_index, 1]
+                = y[global_maximum_index] - y[global_minimum_index]
 
-            if self._calculate_persistence_diagram:
-                b[global_maximum_index, 1] = a[global_minimum_index, 1]
+            if calc_diagram:
+                deaths[global_maximum_index] = y[global_minimum_index]
 
         # Only create a persistence diagram if we have some persistence
         # tuples to store.
-        if b is not None:
-            self._persistence_diagram = PersistenceDiagram(b)
+        if calc_diagram:
+            self._persistence_diagram = PersistenceDiagram(births, deaths)
 
-        # Perform peak filtering: reduce the number of peaks such that
-        # only `n_peaks` remain. If this is not possible (because of a
-        # strange value distribution, try to approximate the number).
         if self._n_peaks is not None:
-            persistence_values = sorted(persistence)[::-1]
-            n_peaks = self._n_peaks
-
-            assert n_vertices == len(persistence_values)
-
-            # Error condition: no filtering should be done because the
-            # number of peaks coincides with the number of points. The
-            # client will not be notified here, because this condition
-            # is only provided for readability.
-            if n_peaks == len(persistence_values):
-                pass
-
-            # Error condition: there are fewer values than there are
-            # peaks requested. In this case, we raise an error.
-            elif n_peaks > len(persistence_values):
-                raise RuntimeError(
-                    f'Specified {n_peaks} peaks, but only {n_vertices} '
-                    f'peaks are available.'
-                )
-
-            # Perform the filtering
-            threshold = persistence_values[n_peaks - 1]
-            persistence[persistence < threshold] = 0
-
-            # Duplicate values exist. Depending on our parameters, we
-            # either ignore this or cut off the peaks that come later
-            # in the sense of their x position.
-            if persistence_values[n_peaks - 1] == persistence_values[n_peaks]:
-                if self._enforce_n_peaks:
-                    persistence[n_peaks + 1:] = 0
-
-        return np.vstack((a[:, 0], persistence)).T
+            self._filter_peaks(persistence)
+
+        # Assemble the output directly in the required layout in order
+        # to avoid a transposed copy.
+        result = np.empty((n_vertices, 2), dtype=a.dtype)
+        result[:, 0] = a[:, 0]
+        result[:, 1] = persistence
+
+        return result
+
+    def _filter_peaks(self, persistence):
+        """Filter peaks of a transformed function in place.
+
+        Reduces the number of peaks such that only `n_peaks` remain. If
+        this is not possible (because of a strange value distribution),
+        tries to approximate the number.
+
+        Parameters
+        ----------
+        persistence : `np.array` of shape (n,)
+            Persistence values of the transformed function. Values of
+            peaks that are filtered will be set to zero.
+        """
+        n_peaks = self._n_peaks
+        n_values = len(persistence)
+
+        # Error condition: no filtering should be done because the
+        # number of peaks coincides with the number of points. The
+        # client will not be notified here, because this condition
+        # is only provided for readability.
+        if n_peaks == n_values:
+            return
+
+        # Error condition: there are fewer values than there are
+        # peaks requested. In this case, we raise an error.
+        elif n_peaks > n_values:
+            raise RuntimeError(
+                f'Specified {n_peaks} peaks, but only {n_values} '
+                f'peaks are available.'
+            )
+
+        # Error condition: at least one peak has to be kept, else no
+        # meaningful threshold exists.
+        elif n_peaks < 1:
+            raise RuntimeError(
+                f'Specified {n_peaks} peaks, but at least one peak '
+                f'has to be kept.'
+            )
+
+        # Only the `n_peaks`-th largest value and its successor are
+        # required, so a partition of the values is sufficient. Both
+        # values are at their sorted positions afterwards.
+        index = n_values - n_peaks
+        persistence_values = np.partition(persistence, (index - 1, index))
+
+        # Perform the filtering
+        threshold = persistence_values[index]
+        persistence[persistence < threshold] = 0
+
+        # Duplicate values exist. Depending on our parameters, we
+        # either ignore this or cut off the peaks that come later
+        # in the sense of their x position.
+        if persistence_values[index - 1] == threshold:
+            if self._enforce_n_peaks:
+                persistence[n_peaks + 1:] = 0
 
     @property
     def persistence_diagram(self):